@@ -3,30 +3,53 @@ Delivery Efficiency Dashboard
 Visualizes data from data/ folder with enhanced visualizations and export capabilities
 """
 
+import math
+import multiprocessing
 import os
+from concurrent.futures import ProcessPoolExecutor
 import dash
-from dash import dcc, html, dash_table
+import numpy as np
+from dash import dcc, html, dash_table, Input, Output
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 from plotly.subplots import make_subplots
 
 # Create outputs directory
 os.makedirs('outputs', exist_ok=True)
 
+# Rows per page in the events table; the pager's page_count is derived from it
+EVENTS_PAGE_SIZE = 10
+
 # ---------- Data Loading ----------
+def cache_is_fresh(cache_path, *source_paths):
+    """True if the parquet cache exists and is at least as new as every source CSV"""
+    if not os.path.exists(cache_path):
+        return False
+    cache_mtime = os.path.getmtime(cache_path)
+    return all(os.path.getmtime(src) <= cache_mtime for src in source_paths)
+
 try:
-    master = pd.read_csv('data/device_master.csv')
-    perf = pd.read_csv('data/performance.csv')
-    loads = pd.read_csv('data/loads_by_day.csv', parse_dates=['date'])
+    if cache_is_fresh('data/master.parquet', 'data/device_master.csv', 'data/performance.csv'):
+        master = pd.read_parquet('data/master.parquet')
+    else:
+        master = pd.read_csv('data/device_master.csv')
+        perf = pd.read_csv('data/performance.csv')
+        
+        # Merge data
+        master = master.merge(perf[['device_id','total_deliveries']], on='device_id', how='left').fillna(0)
+    
+    if cache_is_fresh('data/loads_by_day.parquet', 'data/loads_by_day.csv'):
+        loads = pd.read_parquet('data/loads_by_day.parquet')
+    else:
+        loads = pd.read_csv('data/loads_by_day.csv', parse_dates=['date'])
+    
     heat_df = pd.read_csv('data/idle_heatmap.csv').set_index('device_id')
     flows = pd.read_csv('data/sankey_flows.csv')
     events = pd.read_csv('data/warehouse_events.csv')
     summary = pd.read_csv('data/summary_metrics.csv').iloc[0]
     
-    # Merge data
-    master = master.merge(perf[['device_id','total_deliveries']], on='device_id', how='left').fillna(0)
-    
 except Exception as e:
     print(f"Error loading data: {e}")
     raise
@@ -39,15 +62,17 @@ def create_map():
     master['scaled_size'] = size_scale + (master['total_deliveries'] / max_deliveries * 25) if max_deliveries > 0 else size_scale
     
     # Create custom hover text
-    master['hover_text'] = master.apply(
-        lambda x: f"<b>{x['device_id']}</b><br>"
-                 f"City: {x['city']}<br>"
-                 f"Zone: {x['zone']}<br>"
-                 f"Deliveries: {x['total_deliveries']}<br>"
-                 f"Status: {x['status']}",
-        axis=1
+    master['hover_text'] = (
+        "<b>" + master['device_id'].astype(str) + "</b><br>"
+        + "City: " + master['city'].astype(str) + "<br>"
+        + "Zone: " + master['zone'].astype(str) + "<br>"
+        + "Deliveries: " + master['total_deliveries'].astype(str) + "<br>"
+        + "Status: " + master['status'].astype(str)
     )
     
+    # Map center, computed once per build
+    lat_c, lon_c = master['lat'].mean(), master['lon'].mean()
+    
     fig = px.scatter_mapbox(
         master,
         lat="lat",
@@ -70,7 +95,7 @@ def create_map():
         mapbox_style="carto-positron",
         margin={"r":0,"t":0,"l":0,"b":0},
         mapbox=dict(
-            center=dict(lat=master['lat'].mean(), lon=master['lon'].mean()),
+            center=dict(lat=lat_c, lon=lon_c),
             zoom=4.5
         ),
         legend=dict(
@@ -101,8 +126,9 @@ def create_map():
     return fig
 
 def create_sankey():
-    nodes = pd.unique(flows[['src','trg']].values.ravel('K'))
-    node_indices = {node: i for i, node in enumerate(nodes)}
+    # Factorize sources and targets together so both share one node index
+    codes, nodes = pd.factorize(pd.concat([flows['src'], flows['trg']], ignore_index=True))
+    src_idx, trg_idx = codes[:len(flows)], codes[len(flows):]
     
     fig = go.Figure(go.Sankey(
         node=dict(
@@ -113,8 +139,8 @@ def create_sankey():
             color=["#636EFA", "#EF553B", "#00CC96", "#AB63FA", "#FFA15A"]
         ),
         link=dict(
-            source=[node_indices[src] for src in flows['src']],
-            target=[node_indices[trg] for trg in flows['trg']],
+            source=src_idx,
+            target=trg_idx,
             value=flows['count'],
             color=["rgba(99, 110, 250, 0.3)" for _ in flows['count']]
         )
@@ -132,20 +158,21 @@ def create_sankey():
 
 def create_heatmap():
     # Add annotations to show values in cells
-    annotations = []
-    for y in range(heat_df.shape[0]):
-        for x in range(heat_df.shape[1]):
-            val = heat_df.iloc[y, x]
-            if val > 0:  # Only show annotations for non-zero values
-                annotations.append(
-                    dict(
-                        x=x,
-                        y=y,
-                        text=str(int(val)),
-                        font=dict(color='white' if val > heat_df.values.max()/2 else 'black'),
-                        showarrow=False
-                    )
-                )
+    arr = heat_df.to_numpy()
+    ys, xs = np.nonzero(arr > 0)  # Only show annotations for non-zero values
+    vals = arr[ys, xs]
+    thresh = arr.max() / 2  # Reduced once, not per cell
+    colors = np.where(vals > thresh, 'white', 'black')
+    annotations = [
+        dict(
+            x=int(x),
+            y=int(y),
+            text=str(int(val)),
+            font=dict(color=color),
+            showarrow=False
+        )
+        for x, y, val, color in zip(xs, ys, vals, colors)
+    ]
     
     fig = go.Figure(go.Heatmap(
         z=heat_df.values,
@@ -232,19 +259,31 @@ def create_barchart():
     
     return fig
 
+# ---------- Figures ----------
+# Built once and shared by the dashboard layout and the PNG export
+figures = {
+    'fleet_map': create_map(),
+    'delivery_flows': create_sankey(),
+    'idle_time_heatmap': create_heatmap(),
+    'status_distribution': create_donut(),
+    'weekly_loads': create_barchart()
+}
+
+def _write(name, fig_json):
+    pio.from_json(fig_json).write_image(f"outputs/{name}.png", scale=2, width=1200, height=800)
+
 def save_plot_images():
     """Export all visualizations as PNG files"""
     try:
-        plots = {
-            'fleet_map': create_map(),
-            'delivery_flows': create_sankey(),
-            'idle_time_heatmap': create_heatmap(),
-            'status_distribution': create_donut(),
-            'weekly_loads': create_barchart()
-        }
-        
-        for name, fig in plots.items():
-            fig.write_image(f"outputs/{name}.png", scale=2, width=1200, height=800)
+        workers = min(len(figures), os.cpu_count() or 1)
+        if workers > 1 and 'fork' in multiprocessing.get_all_start_methods():
+            # Kaleido renders one image at a time per process; forked workers each
+            # start their own, without re-running this module's data loading
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork')) as executor:
+                list(executor.map(_write, figures.keys(), [fig.to_json() for fig in figures.values()]))
+        else:
+            for name, fig in figures.items():
+                fig.write_image(f"outputs/{name}.png", scale=2, width=1200, height=800)
         print("Successfully exported all plots as PNG files")
     except Exception as e:
         print(f"Error exporting plots: {e}")
@@ -305,23 +344,23 @@ app.layout = html.Div([
     # First Row
     html.Div([
         html.Div([
-            dcc.Graph(figure=create_map(), config={'displayModeBar': True})
+            dcc.Graph(figure=figures['fleet_map'], config={'displayModeBar': True})
         ], className='map-container'),
         
         html.Div([
-            dcc.Graph(figure=create_sankey(), config={'displayModeBar': True})
+            dcc.Graph(figure=figures['delivery_flows'], config={'displayModeBar': True})
         ], className='sankey-container')
     ], className='row'),
     
     # Second Row
     html.Div([
         html.Div([
-            dcc.Graph(figure=create_heatmap(), config={'displayModeBar': True})
+            dcc.Graph(figure=figures['idle_time_heatmap'], config={'displayModeBar': True})
         ], className='heatmap-container'),
         
         html.Div([
-            dcc.Graph(figure=create_donut(), config={'displayModeBar': True}),
-            dcc.Graph(figure=create_barchart(), config={'displayModeBar': True})
+            dcc.Graph(figure=figures['status_distribution'], config={'displayModeBar': True}),
+            dcc.Graph(figure=figures['weekly_loads'], config={'displayModeBar': True})
         ], className='side-container')
     ], className='row'),
     
@@ -331,8 +370,14 @@ app.layout = html.Div([
         dash_table.DataTable(
             id='events-table',
             columns=[{'name': col, 'id': col} for col in events.columns],
-            data=events.to_dict('records'),
-            page_size=10,
+            # Rows are served a page at a time by update_events_table
+            page_action='custom',
+            page_current=0,
+            page_size=EVENTS_PAGE_SIZE,
+            page_count=math.ceil(len(events) / EVENTS_PAGE_SIZE),
+            sort_action='custom',
+            sort_mode='single',
+            sort_by=[],
             style_table={
                 'overflowX': 'auto',
                 'borderRadius': '8px',
@@ -359,6 +404,24 @@ app.layout = html.Div([
     ], className='table-container')
 ], style={'padding': '20px', 'fontFamily': 'Arial'})
 
+# ---------- Callbacks ----------
+@app.callback(
+    Output('events-table', 'data'),
+    Input('events-table', 'page_current'),
+    Input('events-table', 'page_size'),
+    Input('events-table', 'sort_by')
+)
+def update_events_table(page_current, page_size, sort_by):
+    """Serve only the requested page of events, sorted server-side"""
+    df = events
+    if sort_by:
+        df = events.sort_values(
+            [col['column_id'] for col in sort_by],
+            ascending=[col['direction'] == 'asc' for col in sort_by]
+        )
+    start = page_current * page_size
+    return df.iloc[start:start + page_size].to_dict('records')
+
 # CSS Styles
 app.css.append_css({
     'external_url': [
@@ -1,38 +1,353 @@
 import json
+import logging
+from logging.handlers import QueueHandler, QueueListener
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from google.api_core.exceptions import Forbidden, NotFound
 from google.cloud import storage
+from google.cloud.storage.retry import DEFAULT_RETRY
+from google.auth.transport.requests import Request
 from google.oauth2 import service_account
+from requests.adapters import HTTPAdapter
+import base64
+import google_crc32c
 import os
+import posixpath
+import queue
+import sys
+import threading
 
-def upload_file_to_gcs(file_path, bucket_name, destination_blob_name, credentials):
+logger = logging.getLogger(__name__)
+
+if google_crc32c.implementation != 'c':
+    logger.warning("google_crc32c is using its pure-Python fallback; install google-crc32c with its C extension for fast checksums.")
+
+# File extensions that get uploaded
+ALLOWED_EXTS = frozenset(['.py', '.html', '.csv', '.png', '.npy'])
+
+# Upper bound on simultaneous uploads; override with CP_MAX_CONCURRENCY
+MAX_CONCURRENCY = int(os.environ.get("CP_MAX_CONCURRENCY", 16))
+# Shared by whole-file and part uploads so nested part pools can't outgrow the connection pool
+UPLOAD_SLOTS = threading.BoundedSemaphore(MAX_CONCURRENCY)
+# Threads listing directories in parallel while uploads run
+WALK_WORKERS = 4
+
+# Files below this go up in a single request with no chunk buffer
+SINGLE_REQUEST_LIMIT = 8 << 20
+# Resumable chunks must be a multiple of 256 KiB
+CHUNK_ALIGNMENT = 256 << 10
+# Chunk size for files above SINGLE_REQUEST_LIMIT; anything larger than
+# COMPOSITE_THRESHOLD is split into parts first, so one size covers every case
+DEFAULT_CHUNK_SIZE = 15 << 20
+# Optional fixed chunk size in bytes, set with CP_CLI_GCP_MULTIPART_CHUNKSIZE
+CHUNK_SIZE_OVERRIDE = os.environ.get("CP_CLI_GCP_MULTIPART_CHUNKSIZE", "").strip() or None
+if CHUNK_SIZE_OVERRIDE is not None:
+    if not CHUNK_SIZE_OVERRIDE.isdigit() or int(CHUNK_SIZE_OVERRIDE) <= 0:
+        raise ValueError(f"CP_CLI_GCP_MULTIPART_CHUNKSIZE must be a positive number of bytes, got {CHUNK_SIZE_OVERRIDE!r}")
+    CHUNK_SIZE_OVERRIDE = int(CHUNK_SIZE_OVERRIDE)
+
+# Files at or above this are split into parts, uploaded in parallel and composed server-side
+COMPOSITE_THRESHOLD = 150 << 20
+COMPOSITE_PART_SIZE = 100 << 20
+# GCS accepts at most 32 source objects per compose request
+MAX_COMPOSE_SOURCES = 32
+
+# Exponential backoff on transient errors (429/5xx, connection resets): 1s doubling up to 32s, 5 min budget
+UPLOAD_RETRY = DEFAULT_RETRY.with_delay(initial=1.0, maximum=32.0, multiplier=2.0).with_deadline(300.0)
+
+# Service account key info; set GCS_CREDENTIALS_FILE to load it from a JSON key file instead
+CREDENTIALS = {
+
+}
+
+@lru_cache(maxsize=1)
+def load_credentials_info():
+    """
+    Returns the service account key info, read from GCS_CREDENTIALS_FILE if set.
+    """
+    path = os.environ.get("GCS_CREDENTIALS_FILE")
+    if path:
+        with open(path) as f:
+            return json.load(f)
+    return CREDENTIALS
+
+@lru_cache(maxsize=1)
+def get_credentials():
+    """
+    Parses and validates the service account credentials once per process.
+    """
+    return service_account.Credentials.from_service_account_info(load_credentials_info())
+
+@lru_cache(maxsize=1)
+def get_client():
+    """
+    Builds the authenticated GCS client once per process, with an HTTP connection
+    pool large enough that every upload worker gets its own socket. The access
+    token is fetched up front so upload threads don't all race to refresh it.
+    """
+    credentials = get_credentials()
+    credentials.refresh(Request())
+    client = storage.Client(credentials=credentials, project=load_credentials_info().get("project_id"))
+    adapter = HTTPAdapter(pool_connections=MAX_CONCURRENCY, pool_maxsize=MAX_CONCURRENCY)
+    client._http.mount('https://', adapter)
+    return client
+
+def start_logging(level=logging.INFO):
+    """
+    Routes log records through a queue so upload threads only enqueue them;
+    a single listener thread writes to stdout. Returns the listener to stop when done.
+    """
+    log_queue = queue.Queue()
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    listener = QueueListener(log_queue, handler)
+    logger.addHandler(QueueHandler(log_queue))
+    logger.setLevel(level)
+    logger.propagate = False
+    listener.start()
+    return listener
+
+def get_bucket(bucket_name):
+    """
+    Returns a bucket handle on the shared client.
+    """
+    return get_client().bucket(bucket_name)
+
+def pick_chunk_size(size):
+    """
+    Picks a resumable-upload chunk size from the file size, or None for a single-request upload.
+    """
+    if size < SINGLE_REQUEST_LIMIT:
+        return None
+    chunk_size = CHUNK_SIZE_OVERRIDE or DEFAULT_CHUNK_SIZE
+    return (chunk_size + CHUNK_ALIGNMENT - 1) // CHUNK_ALIGNMENT * CHUNK_ALIGNMENT
+
+def upload_part(bucket, file_path, part_blob_name, offset, length):
+    """
+    Uploads bytes [offset, offset + length) of a local file as its own blob.
+    """
+    blob = bucket.blob(part_blob_name)
+    blob.chunk_size = pick_chunk_size(length)
+    with UPLOAD_SLOTS, open(file_path, 'rb') as f:
+        f.seek(offset)
+        blob.upload_from_file(f, size=length, retry=UPLOAD_RETRY)
+    return blob
+
+def delete_temporary_blobs(bucket, blobs):
+    """
+    Deletes leftover part/compose objects. Failures are only logged, since the
+    destination object may already be in place and the upload itself succeeded.
     """
-    Uploads a file from the local filesystem to a specified GCS bucket using service account credentials.
+    for blob in blobs:
+        try:
+            blob.delete(retry=UPLOAD_RETRY)
+        except NotFound:
+            pass
+        except Exception as e:
+            logger.warning("Could not delete temporary object gs://%s/%s: %s", bucket.name, blob.name, e)
+
+def upload_large_composite(bucket, file_path, destination_blob_name, part_size=COMPOSITE_PART_SIZE):
+    """
+    Uploads a large file as parallel parts and stitches them into destination_blob_name with compose.
+    Parts are composed 32 at a time, recursively. The temporary objects are deleted
+    afterwards whether or not the upload succeeded.
     """
-    if isinstance(credentials, str):
-        credentials = json.loads(credentials)
-    creds = service_account.Credentials.from_service_account_info(credentials)
-    client = storage.Client(credentials=creds, project=credentials.get("project_id"))
-    bucket = client.bucket(bucket_name)
-    blob = bucket.blob(destination_blob_name)
+    size = os.path.getsize(file_path)
+    offsets = list(range(0, size, part_size))
+    part_names = [f"{destination_blob_name}.{i}.part" for i in range(len(offsets))]
+    temporary_blobs = [bucket.blob(name) for name in part_names]
     try:
-        blob.upload_from_filename(file_path)
-        print(f"Uploaded: {file_path} -> gs://{bucket_name}/{destination_blob_name}")
-    except Exception as e:
-        print("Error uploading file:", e)
+        with ThreadPoolExecutor(max_workers=min(len(offsets), MAX_CONCURRENCY)) as executor:
+            parts = list(executor.map(
+                lambda i: upload_part(
+                    bucket, file_path, part_names[i],
+                    offsets[i], min(part_size, size - offsets[i])
+                ),
+                range(len(offsets))
+            ))
+
+        level = 0
+        while len(parts) > MAX_COMPOSE_SOURCES:
+            grouped = []
+            for start in range(0, len(parts), MAX_COMPOSE_SOURCES):
+                blob = bucket.blob(f"{destination_blob_name}.{level}.{start // MAX_COMPOSE_SOURCES}.compose")
+                temporary_blobs.append(blob)
+                blob.compose(parts[start:start + MAX_COMPOSE_SOURCES], retry=UPLOAD_RETRY)
+                grouped.append(blob)
+            parts = grouped
+            level += 1
+        bucket.blob(destination_blob_name).compose(parts, retry=UPLOAD_RETRY)
+    finally:
+        delete_temporary_blobs(bucket, temporary_blobs)
+
+def upload_file_to_gcs(file_path, bucket, destination_blob_name, size=None):
+    """
+    Uploads a file from the local filesystem to an already-resolved GCS bucket.
+    Pass size when it is already known to avoid another stat call.
+    Transient errors are retried with backoff; anything else is raised to the caller.
+    """
+    if size is None:
+        size = os.path.getsize(file_path)
+    if size >= COMPOSITE_THRESHOLD:
+        upload_large_composite(bucket, file_path, destination_blob_name)
+    else:
+        blob = bucket.blob(destination_blob_name)
+        # None below SINGLE_REQUEST_LIMIT keeps small files to a single request
+        blob.chunk_size = pick_chunk_size(size)
+        with UPLOAD_SLOTS:
+            blob.upload_from_filename(file_path, retry=UPLOAD_RETRY)
+    logger.debug("Uploaded: %s -> gs://%s/%s", file_path, bucket.name, destination_blob_name)
+
+def has_allowed_ext(name):
+    """
+    True if the file name ends in one of the extensions we upload.
+    """
+    dot = name.rfind('.')
+    # Like os.path.splitext, leading dots (".csv") mark a hidden file, not an extension
+    if dot < 0 or not name[:dot].lstrip('.'):
+        return False
+    ext = name[dot:]
+    # Suffixes are almost always lowercase already, so only lowercase on a miss
+    return ext in ALLOWED_EXTS or ext.lower() in ALLOWED_EXTS
+
+def walk_files(local_dir, handle_file, workers=WALK_WORKERS):
+    """
+    Walks local_dir with a small pool of threads, each scanning one directory at a time,
+    and calls handle_file(local_path, relative_path, size) for every allowed file as soon as it is found.
+    Returns the directories and files that could not be read; one bad entry never hides its siblings.
+    """
+    base_len = len(os.path.join(local_dir, ''))
+    pending_dirs = queue.Queue()
+    pending_dirs.put(local_dir)
+    unreadable = []
 
-def upload_directory_to_gcs(local_dir, bucket_name, gcs_dir, credentials):
+    def worker():
+        while True:
+            directory = pending_dirs.get()
+            if directory is None:
+                return
+            try:
+                try:
+                    with os.scandir(directory) as it:
+                        entries = list(it)
+                except OSError as e:
+                    logger.error("Error scanning %s: %s", directory, e)
+                    unreadable.append(directory)
+                    continue
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending_dirs.put(entry.path)
+                        elif entry.is_file() and has_allowed_ext(entry.name):
+                            handle_file(entry.path, entry.path[base_len:].replace(os.sep, '/'), entry.stat().st_size)
+                    except Exception as e:
+                        logger.error("Error reading %s: %s", entry.path, e)
+                        unreadable.append(entry.path)
+            finally:
+                pending_dirs.task_done()
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    # Subdirectories are queued before their parent is marked done, so this
+    # only returns once the whole tree has been scanned
+    pending_dirs.join()
+    for _ in threads:
+        pending_dirs.put(None)
+    for thread in threads:
+        thread.join()
+    return unreadable
+
+def list_existing_blobs(bucket, prefix):
+    """
+    Lists everything already uploaded under prefix in one paged request, keyed by blob name.
+    Upload-only accounts may not be allowed to list; then nothing is treated as uploaded.
+    """
+    try:
+        return {
+            blob.name: blob
+            for blob in bucket.list_blobs(prefix=prefix, fields="items(name,size,crc32c),nextPageToken")
+        }
+    except (Forbidden, NotFound) as e:
+        logger.warning("Could not list gs://%s/%s (%s); uploading every file.", bucket.name, prefix, e)
+        return {}
+
+def file_crc32c(file_path):
+    """
+    Computes a file's CRC32C in the base64 form GCS reports in blob.crc32c.
+    """
+    checksum = google_crc32c.Checksum()
+    with open(file_path, 'rb') as f:
+        while chunk := f.read(1 << 20):
+            checksum.update(chunk)
+    return base64.b64encode(checksum.digest()).decode('ascii')
+
+def is_already_uploaded(existing_blob, local_path, size):
+    """
+    True if the remote copy matches the local file, so the upload can be skipped.
+    Sizes are compared first; the file is only hashed when they already match.
+    """
+    return (
+        existing_blob is not None
+        and existing_blob.size == size
+        and existing_blob.crc32c == file_crc32c(local_path)
+    )
+
+def upload_directory_to_gcs(local_dir, bucket, gcs_dir, max_workers=MAX_CONCURRENCY):
         """
         Recursively uploads a directory to GCS under the specified gcs_dir.
-        Only uploads files with allowed extensions.
+        Only uploads files with allowed extensions. Files already present with
+        the same size and checksum are skipped, so re-runs resume cheaply. Uploads
+        start while the walk is still running; whenever a worker frees up it takes
+        the largest file found so far, so a big file never starts last.
+        Returns the local paths that could not be read or uploaded.
         """
-        allowed_exts = {'.py', '.html', '.csv', '.png', '.npy'}
-        for root, _, files in os.walk(local_dir):
-            for file in files:
-                if os.path.splitext(file)[1].lower() not in allowed_exts:
-                    continue
-                local_path = os.path.join(root, file)
-                rel_path = os.path.relpath(local_path, local_dir)
-                gcs_path = os.path.join(gcs_dir, rel_path).replace("\\", "/")
-                upload_file_to_gcs(local_path, bucket_name, gcs_path, credentials)
+        existing = list_existing_blobs(bucket, gcs_dir)
+        skipped = []
+        uploaded = []
+        failed = []
+        # (-size, local_path, gcs_path): the biggest pending file sorts first
+        pending = queue.PriorityQueue()
+
+        def collect(local_path, rel_path, size):
+            gcs_path = posixpath.join(gcs_dir, rel_path)
+            try:
+                unchanged = is_already_uploaded(existing.get(gcs_path), local_path, size)
+            except OSError as e:
+                # Couldn't hash it; upload anyway and let that report the error
+                logger.debug("Could not checksum %s: %s", local_path, e)
+                unchanged = False
+            if unchanged:
+                skipped.append(local_path)
+            else:
+                pending.put((-size, local_path, gcs_path))
+
+        def upload_worker():
+            while True:
+                neg_size, local_path, gcs_path = pending.get()
+                if local_path is None:
+                    return
+                try:
+                    upload_file_to_gcs(local_path, bucket, gcs_path, -neg_size)
+                    uploaded.append(local_path)
+                except Exception as e:
+                    logger.error("Error uploading %s: %s", local_path, e)
+                    failed.append(local_path)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for _ in range(max_workers):
+                executor.submit(upload_worker)
+            try:
+                unreadable = walk_files(local_dir, collect)
+            finally:
+                # Stop markers sort after every real file, so workers drain the queue first
+                for _ in range(max_workers):
+                    pending.put((float('inf'), None, None))
+        logger.info(
+            "Finished %d uploads from %s (%d unchanged, skipped; %d failed)",
+            len(uploaded), local_dir, len(skipped), len(failed) + len(unreadable)
+        )
+        return unreadable + failed
 
 if __name__ == "__main__":
     while True:
@@ -48,9 +363,10 @@ if __name__ == "__main__":
         print("Upload cancelled.")
         exit(0)
     bucket_name = 'coding_evaluation'
-    credentials = {
 
-    }
+    # Authenticate once; every upload below reuses this client and bucket
+    bucket = get_bucket(bucket_name)
+    log_listener = start_logging()
 
     base_dir = os.path.dirname(os.path.abspath(__file__))
     folders = {
@@ -60,12 +376,18 @@ if __name__ == "__main__":
     }
 
     # Upload each folder
+    failed = []
     for key, local_path in folders.items():
         gcs_dir = f"{data_row_id}/{key}/"
         if os.path.exists(local_path):
-            upload_directory_to_gcs(local_path, bucket_name, gcs_dir, credentials)
+            failed.extend(upload_directory_to_gcs(local_path, bucket, gcs_dir))
         else:
-            print(f"Warning: {local_path} does not exist, skipping.")
+            logger.warning("Warning: %s does not exist, skipping.", local_path)
+    log_listener.stop()
+
+    if failed:
+        print(f"\n{len(failed)} file(s) failed to upload. Re-run to retry; unchanged files will be skipped.")
+        exit(1)
 
     print("\nCopy-paste the following into the Labelbox editor:\n")
     print(f"data_gen.py URI: gs://{bucket_name}/{data_row_id}/scripts/data_gen.py")